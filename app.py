@@ -1,12 +1,83 @@
 import streamlit as st
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from threading import Lock, Thread
 from src.generation.pipeline import rag_response
+from src.graph.manager import GraphitiManager
 from src.ingestion.loader import ingest_guidelines
+from src.patient.profile import PatientProfile, load_patient, score_cohort
+from src.retrieval.recommendations import RecommendationIndex
+from src.retrieval.retriever import RetrieverManager
+from src.utils.config_loader import CONFIG
+from src.utils.llm_factory import is_offline
 
 # App Configuration
 st.set_page_config(page_title="CardioCDSS", page_icon="🩺", layout="wide")
 
+
+# Shared Resources: created once per server process and reused by every session
+@st.cache_resource
+def get_event_loop():
+    """Long-lived event loop serving rag_response for all sessions, so async clients stay reusable."""
+    loop = asyncio.new_event_loop()
+    Thread(target=loop.run_forever, daemon=True, name="cdss-loop").start()
+    return loop
+
+
+def run_on_shared_loop(coro):
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+@st.cache_resource
+def get_graph_manager():
+    if is_offline():
+        return None
+
+    async def _create():
+        return GraphitiManager()
+    return run_on_shared_loop(_create())
+
+
+@st.cache_resource
+def warm_retrieval():
+    """Loads the embedding model, Chroma/BM25 and the recommendation index once."""
+    RetrieverManager.get_instance()
+    RecommendationIndex.get_instance()
+
+
+class IngestionJob:
+    """Single background ingestion shared by all sessions."""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingestion")
+        self._lock = Lock()
+        self.future = None
+        self.progress = (0, 0, 0, "")
+
+    @property
+    def running(self) -> bool:
+        return self.future is not None and not self.future.done()
+
+    def start(self) -> bool:
+        with self._lock:
+            if self.running:
+                return False
+            self.progress = (0, 0, 0, "")
+            self.future = self._executor.submit(asyncio.run, ingest_guidelines(on_progress=self._update))
+            return True
+
+    def _update(self, files_done: int, total_files: int, chunks_indexed: int, current_file: str):
+        self.progress = (files_done, total_files, chunks_indexed, current_file)
+
+
+@st.cache_resource
+def get_ingestion_job():
+    return IngestionJob()
+
+
+ingestion_job = get_ingestion_job()
+
 st.title("🩺 CardioCDSS")
 st.markdown("""
 **Bridging the Evidence–Practice Gap in Cardiovascular Care.** Use this system to ingest authoritative guidelines and generate patient-specific management plans.
@@ -21,37 +92,108 @@ with st.sidebar:
         accept_multiple_files=True
     )
     
-    if st.button("🚀 Ingest Guidelines"):
+    if st.button("🚀 Ingest Guidelines", disabled=ingestion_job.running):
         if uploaded_files:
             # Save files to raw data directory defined in your config
-            raw_data_path = Path("data/guidelines")
+            raw_data_path = Path(CONFIG["paths"]["raw_data"])
             raw_data_path.mkdir(parents=True, exist_ok=True)
             
             for uploaded_file in uploaded_files:
                 with open(raw_data_path / uploaded_file.name, "wb") as f:
                     f.write(uploaded_file.getbuffer())
             
-            with st.spinner("Indexing guidelines into Graph and Vector DBs..."):
-                try:
-                    asyncio.run(ingest_guidelines())
-                    st.success("Ingestion Complete!")
-                except Exception as e:
-                    st.error(f"Ingestion failed: {e}")
+            if not ingestion_job.start():
+                st.warning("An ingestion job is already running.")
         else:
             st.warning("Please upload PDF files first.")
 
+    @st.fragment(run_every=2 if ingestion_job.running else None)
+    def ingestion_status():
+        """Polls the background job without re-running the whole page."""
+        files_done, total_files, chunks_indexed, current_file = ingestion_job.progress
+        if ingestion_job.running:
+            st.session_state["ingestion_was_running"] = True
+            st.progress(
+                files_done / total_files if total_files else 0.0,
+                text=f"Indexing {current_file or 'guidelines'}... {chunks_indexed} chunks ({files_done}/{total_files} files)",
+            )
+            return
+
+        if st.session_state.pop("ingestion_was_running", False):
+            # Full rerun: stops the polling and re-enables the Ingest button
+            st.rerun()
+
+        if ingestion_job.future is None:
+            return
+        error = ingestion_job.future.exception()
+        if error:
+            st.error(f"Ingestion failed: {error}")
+            return
+
+        report = ingestion_job.future.result()
+        failed = report["failed"]
+        if report["total_files"] == 0:
+            st.warning("No PDF files found to ingest.")
+        elif len(failed) == report["total_files"]:
+            st.error(f"Ingestion failed for all {len(failed)} files.")
+        elif failed:
+            st.warning(f"Ingested {report['chunks_indexed']} chunks; {len(failed)}/{report['total_files']} files failed.")
+        else:
+            st.success(f"Ingestion Complete! {report['chunks_indexed']} chunks indexed.")
+        for name, reason in failed.items():
+            partial = report.get("partially_indexed", {}).get(name)
+            note = f" ({partial} pages were already indexed; re-ingesting replaces them)" if partial else ""
+            st.caption(f"❌ {name}: {reason}{note}")
+
+    ingestion_status()
+
 # Main UI: Patient Case & Query
 col1, col2 = st.columns([1, 1])
 
 with col1:
     st.subheader("👤 Patient Case")
-    age = st.number_input("Age", min_value=1, max_value=120, value=65)
-    sex = st.selectbox("Sex", ["Male", "Female", "Other"])
-    bp = st.text_input("Blood Pressure (e.g., 155/95)", value="155/95")
-    ldl = st.text_input("LDL-C Level (mg/dL)", value="190")
-    comorbidities = st.text_area("Comorbidities (e.g., Smoker, CKD)", value="Smoker")
-    
-    patient_summary = f"{age}yo {sex}, {comorbidities}, BP {bp}, LDL {ldl}"
+    case_files = sorted(Path(CONFIG["paths"]["patient_cases"]).glob("*.json"))
+    case_choice = st.selectbox("Load Patient Case", ["Manual entry"] + [p.name for p in case_files])
+    patient_profile = None
+
+    try:
+        if case_choice == "Manual entry":
+            age = st.number_input("Age", min_value=1, max_value=120, value=65)
+            sex = st.selectbox("Sex", ["Male", "Female", "Other"])
+            bp = st.text_input("Blood Pressure (e.g., 155/95)", value="155/95")
+            smoking = st.selectbox("Smoking", ["Current", "Former", "Never"])
+            flags = st.columns(3)
+            hypertension = flags[0].checkbox("Hypertension", value=True)
+            diabetes = flags[1].checkbox("Diabetes")
+            dyslipidemia = flags[2].checkbox("Dyslipidemia", value=True)
+            prior_cvd = flags[0].checkbox("Prior CVD")
+            family_history_cvd = flags[1].checkbox("Family history of CVD")
+            labs = st.columns(3)
+            # Leave a lab empty when unknown: it is then excluded from pre-scoring, not treated as 0
+            ldl = labs[0].number_input("LDL-C (mg/dL)", min_value=0.0, value=None)
+            total_cholesterol = labs[1].number_input("Total cholesterol (mg/dL)", min_value=0.0, value=None)
+            hdl = labs[2].number_input("HDL-C (mg/dL)", min_value=0.0, value=None)
+            egfr = labs[0].number_input("eGFR", min_value=0.0, value=None)
+            hba1c = labs[1].number_input("HbA1c (%)", min_value=0.0, value=None)
+            comorbidities = st.text_area("Other history (e.g., CKD, medications)", value="")
+
+            patient_profile = PatientProfile.from_dict({
+                "age": age, "sex": sex, "blood_pressure": bp, "smoking": smoking,
+                "hypertension": hypertension, "diabetes": diabetes, "dyslipidemia": dyslipidemia,
+                "prior_cvd": prior_cvd, "family_history_cvd": family_history_cvd,
+                "ldl": ldl, "total_cholesterol": total_cholesterol, "hdl": hdl, "egfr": egfr, "hbA1c": hba1c,
+                "other_history": comorbidities,
+            })
+        else:
+            patient_profile = load_patient(Path(CONFIG["paths"]["patient_cases"]) / case_choice)
+            st.info(patient_profile.to_summary())
+
+        patient_summary = patient_profile.to_summary()
+        assessment = score_cohort([patient_profile])[0]
+        st.markdown(f"**Pre-scored:** {assessment.describe() or 'insufficient data for risk categories'}")
+    except (ValueError, OSError) as e:
+        patient_profile, patient_summary = None, None
+        st.error(f"Invalid patient case: {e}")
 
 with col2:
     st.subheader("🔍 Clinical Query")
@@ -61,23 +203,37 @@ with col2:
     )
     
     if st.button("Generate Recommendation"):
-        if query:
-            with st.spinner("Analyzing guidelines..."):
-                # Execute our Hybrid RAG Pipeline
-                response, docs, variants = asyncio.run(rag_response(query, patient_summary))
-                
-                st.markdown("### 📋 Management Recommendation")
-                st.write(response)
-                
-                with st.expander("📚 View Cited Sources"):
-                    for doc in docs:
-                        source = doc.metadata.get('source', 'Unknown')
-                        st.info(f"**Source:** {source}\n\n**Content Snippet:** {doc.page_content[:300]}...")
-                
-                with st.expander("🔄 Query Expansion Variants"):
-                    st.write("The system expanded your query to improve recall:")
-                    for v in variants:
-                        st.code(v)
+        if not patient_summary:
+            st.error("Please fix the patient case first.")
+        elif query:
+            # Same question for the same patient is answered once per session
+            answers = st.session_state.setdefault("answers", {})
+            cache_key = (query.strip(), patient_summary)
+
+            if cache_key not in answers:
+                with st.spinner("Analyzing guidelines..."):
+                    warm_retrieval()
+                    # Execute our Hybrid RAG Pipeline on the shared loop
+                    answers[cache_key] = run_on_shared_loop(rag_response(
+                        query,
+                        patient_summary,
+                        patient_profile=patient_profile,
+                        graph_manager=get_graph_manager(),
+                    ))
+
+            response, docs, variants = answers[cache_key]
+            st.markdown("### 📋 Management Recommendation")
+            st.write(response)
+            
+            with st.expander("📚 View Cited Sources"):
+                for doc in docs:
+                    source = doc.metadata.get('source', 'Unknown')
+                    st.info(f"**Source:** {source}\n\n**Content Snippet:** {doc.page_content[:300]}...")
+            
+            with st.expander("🔄 Query Expansion Variants"):
+                st.write("The system expanded your query to improve recall:")
+                for v in variants:
+                    st.code(v)
         else:
             st.error("Please enter a query.")
 
@@ -2,8 +2,8 @@ from operator import itemgetter
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnableParallel
-from langchain_groq import ChatGroq
-from src.utils.config_loader import CONFIG, load_prompt
+from src.utils.config_loader import load_prompt
+from src.utils.llm_factory import get_chat_model
 from src.utils.logger import trace_task
 
 @trace_task
@@ -20,10 +20,7 @@ def get_rag_chain():
     """
     Builds the unified LCEL RAG chain (The logic structure).
     """
-    llm = ChatGroq(
-        model=CONFIG["llm"]["model"],
-        temperature=CONFIG["llm"]["temperature"],
-    )
+    llm = get_chat_model()
 
     system_prompt = load_prompt("system_prompt") 
     user_template = load_prompt("recommendation_prompt") 
@@ -1,68 +1,100 @@
+import asyncio
 from langchain_core.documents import Document
 from langchain_cohere import CohereRerank
 from src.retrieval.retriever import get_retriever
+from src.retrieval.dedup import collapse_near_duplicates
+from src.retrieval.recommendations import RecommendationIndex, CLASS_RANK
 from src.utils.config_loader import CONFIG
 from src.utils.logger import trace_task, logger
 from src.graph.manager import GraphitiManager
 from src.generation.rewriter import generate_query_variants
 from src.generation.generator import get_rag_chain, format_docs
+from src.utils.llm_factory import is_offline
+from src.patient.profile import PatientProfile, score_cohort, retrieval_terms
 
 @trace_task
-async def rag_response(query: str, patient_summary: str, metadata_filter: dict | None = None):
-    """Orchestrates the Hybrid Multi-Query RAG flow."""
+async def rag_response(
+    query: str,
+    patient_summary: str,
+    metadata_filter: dict | None = None,
+    patient_profile: PatientProfile | None = None,
+    graph_manager: GraphitiManager | None = None,
+):
+    """
+    Orchestrates the Hybrid Multi-Query RAG flow.
+    Blocking steps run in worker threads so concurrent requests can share one event loop.
+    """
     
-    # 1. Setup Retrieval Components
-    base_retriever = get_retriever(metadata_filter=metadata_filter)
+    # 1. Setup Generation Chain
     rag_chain = get_rag_chain()
     
-    # 2. Hybrid Retrieval (Multi-Query + Graph)
-    gm = GraphitiManager()
-    graph_results = await gm.search_related_context(query)
-    variants = generate_query_variants(query)
-    
+    # 2. Hybrid Retrieval (Multi-Query + Graph; the graph stage needs Neo4j/Ollama and is skipped offline)
+    offline = is_offline()
+    gm = None if offline else (graph_manager or GraphitiManager())
+
+    async def _search_graph():
+        return await gm.search_related_context(query) if gm else []
+
+    graph_results, variants = await asyncio.gather(
+        _search_graph(),
+        asyncio.to_thread(generate_query_variants, query),
+    )
+
+    # Structured patients: pre-scored guideline categories focus retrieval and the prompt
+    if patient_profile is not None:
+        assessment = score_cohort([patient_profile])[0]
+        terms = retrieval_terms(patient_profile, assessment)
+        if terms:
+            variants.append(f"{query} ({'; '.join(terms)})")
+        # Only categories whose inputs are known reach the prompt
+        if assessment.describe():
+            patient_summary = f"{patient_summary}\nPre-scored: {assessment.describe()}"
     
+    # Recommendation Index first: short Class/LOE statements; each confident hit replaces
+    # one dense and one BM25 candidate per variant, so fewer page chunks are retrieved and reranked
+    rec_docs = []
+    if CONFIG.get("recommendations", {}).get("enabled", True):
+        rec_docs = RecommendationIndex.get_instance().search(variants)
+    base_retriever = get_retriever(
+        metadata_filter=metadata_filter,
+        k=max(CONFIG["retrieval"]["k"] - len(rec_docs), 1),
+    )
+
     # Gather Vector Candidates
-    all_vector_docs = []
-    for var in variants:
-        all_vector_docs.extend(base_retriever.invoke(var))
+    vector_results = await asyncio.gather(*(asyncio.to_thread(base_retriever.invoke, var) for var in variants))
+    all_vector_docs = [doc for docs in vector_results for doc in docs]
     
     # Gather Graph Candidates
-    unique_candidates = []
     def _extract_node_text(node):
         return getattr(node, "content", getattr(node, "text", getattr(node, "value", str(node))))
-    for node in graph_results:
-         unique_candidates.append(Document(
-             page_content=_extract_node_text(node),
-             metadata={"source": "Knowledge Graph"}
-         ))
+    graph_docs = [
+        Document(page_content=_extract_node_text(node), metadata={"source": "Knowledge Graph"})
+        for node in graph_results
+    ]
 
-    # 3. Deduplication
-    seen = set()
-    unique_candidates = []
-    
-    # Add Graph Chunks
-    for text in (_extract_node_text(node) for node in graph_results):
-        if text not in seen:
-            unique_candidates.append(Document(page_content=text, metadata={"source": "Knowledge Graph"}))
-            seen.add(text)
-            
-    # Add Vector Chunks
-    for doc in all_vector_docs:
-        if doc.page_content not in seen:
-            unique_candidates.append(doc)
-            seen.add(doc.page_content)
+    # 3. Near-Duplicate Collapse (MinHash, precomputed for page chunks and recommendation rows at ingestion)
+    unique_candidates = collapse_near_duplicates(rec_docs + graph_docs + all_vector_docs)
+    n_recs = sum(doc.metadata.get("type") == "recommendation" for doc in unique_candidates)
 
-    logger.info(f"🧬 Hybrid Recall: {len(unique_candidates)} unique chunks found.")
+    logger.info(f"🧬 Hybrid Recall: {len(unique_candidates)} unique chunks ({n_recs} recommendations) found.")
 
-    # 4. Precision Reranking
-    if CONFIG["retrieval"].get("rerank") and len(unique_candidates) > 0:
-        reranker = CohereRerank(model="rerank-english-v3.0", top_n=CONFIG["retrieval"]["rerank_top_k"])
-        final_docs = reranker.compress_documents(unique_candidates, query)
+    # 4. Precision Reranking: recommendations compete with page chunks for the prompt slots
+    top_k = CONFIG["retrieval"]["rerank_top_k"]
+    if CONFIG["retrieval"].get("rerank") and not offline and len(unique_candidates) > 0:
+        reranker = CohereRerank(model="rerank-english-v3.0", top_n=top_k)
+        selected = list(await asyncio.to_thread(reranker.compress_documents, unique_candidates, query))
     else:
-        final_docs = unique_candidates[:CONFIG["retrieval"]["rerank_top_k"]]
+        selected = unique_candidates[:top_k]
+
+    # Recommendations lead the context, strongest class first, then by relevance
+    selected_recs = sorted(
+        (doc for doc in selected if doc.metadata.get("type") == "recommendation"),
+        key=lambda doc: (CLASS_RANK[doc.metadata["class"]], -doc.metadata["relevance"]),
+    )
+    final_docs = selected_recs + [doc for doc in selected if doc.metadata.get("type") != "recommendation"]
 
     # 5. Generation
-    response = rag_chain.invoke({
+    response = await rag_chain.ainvoke({
         "query": query, 
         "patient_summary": patient_summary,
         "context": format_docs(final_docs)
@@ -2,7 +2,7 @@ from src.utils.config_loader import CONFIG
 from src.utils.logger import trace_task, logger
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_groq import ChatGroq
+from src.utils.llm_factory import get_chat_model
 
 @trace_task
 def generate_query_variants(query: str) -> list[str]:
@@ -10,10 +10,9 @@ def generate_query_variants(query: str) -> list[str]:
     if not CONFIG["query_expansion"]["enabled"]:
         return [query]
     
-    model = ChatGroq(
-        model=CONFIG["llm"]["model"],
+    model = get_chat_model(
+        temperature=CONFIG["query_expansion"]["temperature"],
         max_tokens=4096,
-        temperature=CONFIG["query_expansion"]["temperature"]
     )
     
     num_variants = CONFIG["query_expansion"].get("num_variants", 3)
@@ -9,29 +9,34 @@ from graphiti_core.cross_encoder.openai_reranker_client import OpenAIRerankerCli
 from graphiti_core.driver.neo4j_driver import Neo4jDriver
 
 from src.utils.config_loader import CONFIG
+from src.utils.llm_factory import get_async_openai_client
 
 load_dotenv()
 
 
 class GraphitiManager:
     def __init__(self):
-        # 1. Configure the Local LLM (Ollama)
+        graph_cfg = CONFIG["graph"]
+
+        # 1. Configure the Local LLM (Ollama by default)
         llm_config = LLMConfig(
-            api_key="ollama", 
-            model="sciphi/triplex:latest", 
-            small_model="sciphi/triplex:latest",
-            base_url="http://localhost:11434/v1",
+            api_key=graph_cfg["api_key"],
+            model=graph_cfg["llm_model"],
+            small_model=graph_cfg.get("small_model", graph_cfg["llm_model"]),
+            base_url=graph_cfg["base_url"],
         )
-        llm_client = OpenAIGenericClient(config=llm_config)
+        # Shared pooled client, see src/utils/llm_factory.py
+        openai_client = get_async_openai_client(graph_cfg["base_url"], graph_cfg["api_key"])
+        llm_client = OpenAIGenericClient(config=llm_config, client=openai_client)
 
-        # 2. Configure Local Embedder (Ollama)
+        # 2. Configure Local Embedder
         embedder_config = OpenAIEmbedderConfig(
-            api_key="ollama",
-            embedding_model="nomic-embed-text:latest",
-            embedding_dim=768,
-            base_url="http://localhost:11434/v1",
+            api_key=graph_cfg["api_key"],
+            embedding_model=graph_cfg["embedding_model"],
+            embedding_dim=graph_cfg["embedding_dim"],
+            base_url=graph_cfg["base_url"],
         )
-        embedder = OpenAIEmbedder(config=embedder_config)
+        embedder = OpenAIEmbedder(config=embedder_config, client=openai_client)
 
         # 3. Initialize Graphiti with Cardiology Context
         URI = os.getenv("neo4j_uri")
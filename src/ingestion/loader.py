@@ -1,12 +1,36 @@
 import nltk
 from pathlib import Path
 import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor
 from tqdm import tqdm
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
 from src.utils.config_loader import CONFIG
 from src.utils.logger import trace_task, logger
 from src.graph.manager import GraphitiManager
 from src.retrieval.retriever import RetrieverManager
+from src.utils.llm_factory import is_offline
+from src.retrieval.dedup import add_minhash_metadata
+from src.retrieval.recommendations import RecommendationIndex, extract_recommendations
+from src.ingestion.pdf_pages import iter_pdf_pages, create_page_pool
+
+
+def stream_rolling_overlap(pages):
+    """
+    Streaming form of `apply_rolling_overlap`: only the previous page's last sentence is kept in memory.
+    The prefix length is recorded in `metadata["overlap_chars"]` so the page's own text can be recovered.
+    """
+    last_sentence = None
+    for page in pages:
+        original = page.page_content.strip()
+        if last_sentence:
+            prefix = f"...{last_sentence}\n\n"
+            page.page_content = prefix + page.page_content
+            page.metadata["overlap_chars"] = len(prefix)
+
+        sentences = nltk.sent_tokenize(original) if original else []
+        last_sentence = sentences[-1] if sentences else None
+        yield page
 
 
 def apply_rolling_overlap(pages):
@@ -14,16 +38,36 @@ def apply_rolling_overlap(pages):
     Logic to ensure clinical context isn't cut off at page breaks.
     Standardizes page content into chunks with a sliding window."""
 
-    for i in range(1, len(pages)):
-        prev_content = pages[i-1].page_content.strip()
-        if not prev_content: continue
+    return list(stream_rolling_overlap(pages))
 
-        sentences = nltk.sent_tokenize(prev_content)
-        if sentences:
-            last_sentence = sentences[-1]
-            pages[i].page_content = f"...{last_sentence}\n\n{pages[i].page_content}"
-    
-    return pages
+
+def stream_pdf_chunks(pdf_path: Path, executor: Executor | None = None):
+    """
+    Yields enriched, overlap-stitched chunks of a single PDF one page at a time.
+    Pass the run's page pool as `executor` to parse page ranges in worker processes.
+    """
+    logger.info(f"📂 Processing file: {pdf_path.name}")
+    ingestion_cfg = CONFIG.get("ingestion", {})
+    pages = iter_pdf_pages(
+        pdf_path,
+        executor=executor,
+        pages_per_worker=ingestion_cfg.get("pages_per_worker", 25),
+        max_in_flight=ingestion_cfg.get("workers", 1),
+    )
+
+    def _documents():
+        for i, text in pages:
+            # Enrich metadata for better retrieval
+            yield Document(page_content=text, metadata={
+                "source": pdf_path.name,
+                "page": i,
+                "chunk_id": f"{pdf_path.name}_pg_{i}",
+                "type": "cardiology_guideline"
+            })
+
+    for chunk in stream_rolling_overlap(_documents()):
+        add_minhash_metadata([chunk])
+        yield chunk
 
 
 @trace_task
@@ -31,24 +75,22 @@ def load_and_chunk_pdf(pdf_path: Path):
     """
     Parses a single PDF and prepares it for ingestion.
     """
-    logger.info(f"📂 Processing file: {pdf_path.name}")
-    
-    loader = PyPDFLoader(str(pdf_path))
-    pages = loader.load()
-    
-    # Enrich metadata for better retrieval
-    for i, page in enumerate(pages):
-        page.metadata.update({
-            "source": pdf_path.name, 
-            "chunk_id": f"{pdf_path.name}_pg_{i}",
-            "type": "cardiology_guideline"
-        })
-    
-    chunks = apply_rolling_overlap(pages)
+    chunks = list(stream_pdf_chunks(pdf_path))
     logger.info(f"✂️ Created {len(chunks)} chunks from {pdf_path.name}")
     return chunks
 
 
+def _batched(iterable, size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 @trace_task
 async def sync_to_graphiti(chunks, graph_manager: GraphitiManager):
     """
@@ -64,49 +106,88 @@ async def sync_to_graphiti(chunks, graph_manager: GraphitiManager):
 
 
 @trace_task
-def sync_to_vector_store(all_chunks):
-    """Batches data into ChromaDB and refreshes BM25."""
+def sync_to_vector_store(chunks, refresh: bool = True):
+    """Batches data into ChromaDB and refreshes BM25. Chunk ids make re-ingesting a file an upsert."""
    
     manager = RetrieverManager.get_instance()
-    manager.vectorstore.add_documents(all_chunks)
-    manager.refresh_bm25()
-    logger.info("🧬 Vector: Successfully indexed all chunks into ChromaDB.")
+    manager.vectorstore.add_documents(chunks, ids=[c.metadata["chunk_id"] for c in chunks])
+    if refresh:
+        manager.refresh_bm25()
+    logger.info(f"🧬 Vector: Successfully indexed {len(chunks)} chunks into ChromaDB.")
 
 
 @trace_task
-async def ingest_guidelines():
-    """Main Orchestrator for the Ingestion Pipeline."""
+async def ingest_guidelines(on_progress: Callable[[int, int, int, str], None] | None = None):
+    """
+    Main Orchestrator for the Ingestion Pipeline.
+    `on_progress(files_done, total_files, chunks_indexed, current_file)` is called after every batch.
+    Returns a report: {"total_files", "chunks_indexed", "failed": {file name: error},
+    "partially_indexed": {file name: chunks indexed before the failure}}.
+    Batches are indexed as they stream, so a failed file may be partly indexed; re-ingesting it
+    replaces those chunks in ChromaDB instead of duplicating them.
+    """
     
     raw_dir = Path(CONFIG["paths"]["raw_data"])
     pdf_files = list(raw_dir.glob("*.pdf"))
+    failed, partially_indexed = {}, {}
     
     if not pdf_files:
         logger.warning(f"⚠️ No PDF files found in {raw_dir}")
-        return
+        return {"total_files": 0, "chunks_indexed": 0, "failed": failed, "partially_indexed": partially_indexed}
 
     # Initialize Graphiti Manager
-    graph_manager = GraphitiManager()
-    all_chunks = []
+    graph_manager = None if is_offline() else GraphitiManager()
+    rec_index = RecommendationIndex.get_instance()
+    batch_size = CONFIG.get("ingestion", {}).get("batch_size", 32)
+    page_pool = create_page_pool(CONFIG.get("ingestion", {}).get("workers", 1))
+    indexed = 0
 
     print("\n🚀 Starting PDF Ingestion...")
 
-    for pdf_path in tqdm(pdf_files, desc="Overall Progress", unit="file"):
-        try:
-            # Step A: Load and Chunk
-            chunks = load_and_chunk_pdf(pdf_path)
-            
-            # Step B: Sync to Knowledge Graphmediate 
-            await sync_to_graphiti(chunks, graph_manager)
-            
-            all_chunks.extend(chunks)
-        except Exception as e:
-            logger.error(f"❌ Failed to process {pdf_path.name}: {e}", exc_info=True)
-
-    
-    if all_chunks:
-        sync_to_vector_store(all_chunks)
+    def _report(files_done: int, current_file: str):
+        if on_progress:
+            on_progress(files_done, len(pdf_files), indexed, current_file)
+
+    try:
+        for files_done, pdf_path in enumerate(tqdm(pdf_files, desc="Overall Progress", unit="file")):
+            file_indexed = 0
+            try:
+                # Step A: Stream pages and hand each batch straight to the indexes
+                for batch in _batched(stream_pdf_chunks(pdf_path, page_pool), batch_size):
+                    # Step B: Sync to Knowledge Graph
+                    if graph_manager:
+                        await sync_to_graphiti(batch, graph_manager)
+                    # Step C: Sync to Vector Store (BM25 is rebuilt once at the end)
+                    sync_to_vector_store(batch, refresh=False)
+                    # Step D: Extract Class/LOE rows into the recommendation index
+                    rec_index.add([rec for chunk in batch for rec in extract_recommendations(chunk)])
+                    indexed += len(batch)
+                    file_indexed += len(batch)
+                    _report(files_done, pdf_path.name)
+            except Exception as e:
+                logger.error(f"❌ Failed to process {pdf_path.name}: {e}", exc_info=True)
+                failed[pdf_path.name] = str(e)
+                if file_indexed:
+                    partially_indexed[pdf_path.name] = file_indexed
+            _report(files_done + 1, pdf_path.name)
+    finally:
+        if page_pool:
+            page_pool.shutdown()
+
+    if indexed:
+        RetrieverManager.get_instance().refresh_bm25()
+        rec_index.refresh()
     
-    logger.info("✅ Ingestion Pipeline Completed Successfully.")
+    if failed:
+        logger.warning(f"⚠️ Ingestion Pipeline Completed with {len(failed)}/{len(pdf_files)} failed files.")
+    else:
+        logger.info("✅ Ingestion Pipeline Completed Successfully.")
+    return {
+        "total_files": len(pdf_files),
+        "chunks_indexed": indexed,
+        "failed": failed,
+        "partially_indexed": partially_indexed,
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,52 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from pypdf import PdfReader
+
+# Kept free of heavy imports (models, Chroma, Graphiti): spawned workers import this module on start-up.
+
+
+def extract_page_range(pdf_path: str, start: int, end: int) -> list[tuple[int, str]]:
+    """Worker: extracts text for pages [start, end) of a single PDF."""
+    reader = PdfReader(pdf_path)
+    return [(i, reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+def page_ranges(total_pages: int, pages_per_worker: int) -> list[tuple[int, int]]:
+    return [(s, min(s + pages_per_worker, total_pages)) for s in range(0, total_pages, pages_per_worker)]
+
+
+def create_page_pool(workers: int) -> ProcessPoolExecutor | None:
+    """
+    One pool per ingestion run. Uses `spawn` because forking a process that already runs
+    tokenizer threads and a Chroma client (e.g. the Streamlit server) can deadlock.
+    """
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def iter_pdf_pages(pdf_path: Path, executor: Executor | None = None, pages_per_worker: int = 25, max_in_flight: int = 2):
+    """
+    Lazily yields `(page_number, text)` for a PDF, in page order.
+    Without an executor, a single reader walks the pages in-process. With one, page ranges are
+    parsed by the pool and at most `max_in_flight` ranges are pending, so memory is bounded by
+    range size rather than document size.
+    """
+    reader = PdfReader(str(pdf_path))
+    ranges = page_ranges(len(reader.pages), pages_per_worker)
+
+    if executor is None or len(ranges) <= 1:
+        for i, page in enumerate(reader.pages):
+            yield i, page.extract_text() or ""
+        return
+
+    del reader
+    in_flight = deque()
+    for start, end in ranges:
+        in_flight.append(executor.submit(extract_page_range, str(pdf_path), start, end))
+        if len(in_flight) >= max_in_flight:
+            yield from in_flight.popleft().result()
+    while in_flight:
+        yield from in_flight.popleft().result()
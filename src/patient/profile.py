@@ -0,0 +1,266 @@
+import sys
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+import numpy as np
+from src.utils.config_loader import CONFIG
+from src.utils.logger import logger
+
+# ESC/EAS 2019 risk categories, index-aligned with the LDL-C goals below (mg/dL)
+RISK_CATEGORIES = np.array(["low", "moderate", "high", "very_high"])
+LDL_TARGETS_MG_DL = np.array([116, 100, 70, 55])
+
+# KDIGO eGFR stages (mL/min/1.73m²)
+CKD_STAGES = np.array(["G5", "G4", "G3b", "G3a", "G2", "G1"])
+CKD_EGFR_EDGES = np.array([15, 30, 45, 60, 90])
+
+GLYCAEMIC_STATUS = np.array(["normoglycaemia", "prediabetes", "diabetes_range"])
+HBA1C_EDGES = np.array([5.7, 6.5])
+
+
+def _optional_float(data: dict, *keys: str) -> float | None:
+    """Missing, null or empty measurements stay None instead of defaulting to a misleading 0."""
+    for key in keys:
+        value = data.get(key)
+        if value is None or value == "":
+            continue
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Patient case field '{key}' must be numeric, got {value!r}")
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class PatientProfile:
+    """
+    Compact typed record of a patient case (see data/patient_cases/*.json).
+    Only `age` is required; unknown measurements are None.
+    """
+    age: int
+    sex: str = "Unknown"
+    height: float | None = None
+    weight: float | None = None
+    hypertension: bool = False
+    diabetes: bool = False
+    dyslipidemia: bool = False
+    smoking: str = "Never"
+    family_history_cvd: bool = False
+    prior_cvd: bool = False
+    total_cholesterol: float | None = None
+    ldl: float | None = None
+    hdl: float | None = None
+    triglycerides: float | None = None
+    hba1c: float | None = None
+    egfr: float | None = None
+    blood_pressure: str = ""
+    chief_complaint: str = ""
+    symptoms: tuple[str, ...] = field(default_factory=tuple)
+    other_history: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PatientProfile":
+        """Raises ValueError (not KeyError) for missing age or non-numeric measurements."""
+        age = _optional_float(data, "age")
+        if age is None:
+            raise ValueError("Patient case is missing required field 'age'")
+
+        return cls(
+            age=int(age),
+            sex=data.get("sex") or "Unknown",
+            height=_optional_float(data, "height"),
+            weight=_optional_float(data, "weight"),
+            hypertension=bool(data.get("hypertension", False)),
+            diabetes=bool(data.get("diabetes", False)),
+            dyslipidemia=bool(data.get("dyslipidemia", False)),
+            smoking=data.get("smoking") or "Never",
+            family_history_cvd=bool(data.get("family_history_cvd", False)),
+            prior_cvd=bool(data.get("prior_cvd", False)),
+            total_cholesterol=_optional_float(data, "total_cholesterol"),
+            ldl=_optional_float(data, "ldl"),
+            hdl=_optional_float(data, "hdl"),
+            triglycerides=_optional_float(data, "triglycerides"),
+            hba1c=_optional_float(data, "hbA1c", "hba1c"),
+            egfr=_optional_float(data, "egfr"),
+            blood_pressure=data.get("blood_pressure") or "",
+            chief_complaint=data.get("chief_complaint") or "",
+            symptoms=tuple(s for s in data.get("symptoms", []) if s and s != "None"),
+            other_history=data.get("other_history") or "",
+        )
+
+    @property
+    def bmi(self) -> float | None:
+        if not self.height or not self.weight:
+            return None
+        return self.weight / (self.height / 100) ** 2
+
+    def to_summary(self) -> str:
+        """Free-text summary used as `patient_summary` in the prompt; unknown values are left out."""
+        conditions = [name for name, present in (
+            ("Hypertension", self.hypertension),
+            ("Diabetes", self.diabetes),
+            ("Dyslipidemia", self.dyslipidemia),
+            ("Prior CVD", self.prior_cvd),
+            ("Family history of CVD", self.family_history_cvd),
+        ) if present]
+        labs = [f"{name} {value:g}{unit}" for name, value, unit in (
+            ("TC", self.total_cholesterol, " mg/dL"),
+            ("LDL", self.ldl, " mg/dL"),
+            ("HDL", self.hdl, " mg/dL"),
+            ("TG", self.triglycerides, " mg/dL"),
+            ("HbA1c", self.hba1c, "%"),
+            ("eGFR", self.egfr, ""),
+        ) if value is not None]
+
+        demographics = f"{self.age}yo {self.sex}"
+        if self.bmi is not None:
+            demographics += f", BMI {self.bmi:.1f}"
+        parts = [f"{demographics}, Smoking: {self.smoking}", f"Conditions: {', '.join(conditions) or 'None'}"]
+        if self.blood_pressure:
+            parts.append(f"BP {self.blood_pressure}")
+        if labs:
+            parts.append(", ".join(labs))
+        if self.chief_complaint:
+            parts.append(f"Complaint: {self.chief_complaint}")
+        if self.symptoms:
+            parts.append(f"Symptoms: {', '.join(self.symptoms)}")
+        if self.other_history:
+            parts.append(f"History: {self.other_history}")
+        return ". ".join(parts)
+
+
+@dataclass(frozen=True, slots=True)
+class RiskAssessment:
+    """
+    Guideline categories derived from a `PatientProfile` without any LLM call.
+    A category is None when the measurements it depends on are unknown. With `risk_is_minimum`,
+    unknown measurements could still raise `risk_category` (and lower `ldl_target`).
+    """
+    risk_category: str | None
+    ckd_stage: str | None
+    glycaemic_status: str | None
+    ldl_target: int | None
+    ldl_at_target: bool | None
+    risk_is_minimum: bool = False
+
+    def describe(self) -> str:
+        """One-line summary of the known categories ('' when nothing could be scored)."""
+        parts = []
+        if self.risk_category:
+            prefix = "≥ " if self.risk_is_minimum else ""
+            parts.append(f"{prefix}{self.risk_category.replace('_', ' ')} CV risk")
+        if self.ckd_stage:
+            parts.append(f"CKD {self.ckd_stage}")
+        if self.glycaemic_status:
+            parts.append(self.glycaemic_status.replace("_", " "))
+        if self.ldl_target is not None:
+            goal = f"LDL-C goal <{self.ldl_target} mg/dL"
+            if self.risk_is_minimum:
+                goal += " or lower"
+            if self.ldl_at_target is not None:
+                goal += f" ({'at' if self.ldl_at_target else 'above'} goal)"
+            parts.append(goal)
+        return ", ".join(parts)
+
+
+def load_patient(path: Path) -> PatientProfile:
+    with open(path, "r") as f:
+        return PatientProfile.from_dict(json.load(f))
+
+
+def load_patient_cases(directory: Path | None = None) -> list[PatientProfile]:
+    directory = Path(directory or CONFIG["paths"]["patient_cases"])
+    return [load_patient(p) for p in sorted(directory.glob("*.json"))]
+
+
+def _column(profiles: list[PatientProfile], attr: str) -> np.ndarray:
+    return np.array([np.nan if getattr(p, attr) is None else getattr(p, attr) for p in profiles], dtype=float)
+
+
+def score_cohort(profiles: list[PatientProfile]) -> list[RiskAssessment]:
+    """
+    Vectorized risk pre-scoring over a batch of patients. Unknown measurements are NaN and the
+    categories that depend on them come back as None.
+
+    The risk category is a rule-based approximation of the ESC categories: established CVD,
+    diabetes, CKD and markedly elevated cholesterol are applied as in the guideline, while the
+    SCORE2 step (which needs systolic BP, absent from the case files) is replaced by an
+    age x risk-factor-count proxy. It is reported exactly when a very-high-risk criterion is met,
+    when eGFR is known and a high-risk criterion is met, or when LDL-C, total cholesterol and
+    eGFR are all known. A high-risk criterion with unknown eGFR (which could make the patient
+    very high risk) is reported as a minimum; an unknown BMI counts as not obese.
+    """
+    if not profiles:
+        return []
+
+    age = _column(profiles, "age")
+    ldl = _column(profiles, "ldl")
+    tc = _column(profiles, "total_cholesterol")
+    egfr = _column(profiles, "egfr")
+    hba1c = _column(profiles, "hba1c")
+    bmi = _column(profiles, "bmi")
+    diabetes = np.array([p.diabetes for p in profiles])
+    prior_cvd = np.array([p.prior_cvd for p in profiles])
+    risk_factors = (
+        np.array([p.smoking.lower() == "current" for p in profiles], dtype=int)
+        + np.array([p.hypertension for p in profiles], dtype=int)
+        + np.array([p.dyslipidemia for p in profiles], dtype=int)
+        + np.array([p.family_history_cvd for p in profiles], dtype=int)
+        + (bmi >= 30)
+    )
+
+    egfr_known, hba1c_known, ldl_known = ~np.isnan(egfr), ~np.isnan(hba1c), ~np.isnan(ldl)
+    ckd_idx = np.digitize(np.nan_to_num(egfr), CKD_EGFR_EDGES)
+    glyc_idx = np.digitize(np.nan_to_num(hba1c), HBA1C_EDGES)
+
+    # NaN comparisons are False, so unknown values never trigger a criterion
+    very_high = prior_cvd | (egfr < 30) | (diabetes & (egfr < 60))
+    high = (ldl >= 190) | (tc >= 310) | diabetes | (egfr < 60) | ((age >= 70) & (risk_factors >= 2)) | ((age >= 50) & (risk_factors >= 3))
+    moderate = (age >= 40) & (risk_factors >= 1)
+    # Only eGFR can still raise a met high-risk criterion to very high (prior CVD and diabetes are always known)
+    risk_exact = very_high | (egfr_known & high) | (ldl_known & ~np.isnan(tc) & egfr_known)
+    risk_minimum = ~risk_exact & high
+    risk_known = risk_exact | risk_minimum
+
+    risk_idx = np.select([very_high, high, moderate], [3, 2, 1], default=0)
+    targets = LDL_TARGETS_MG_DL[risk_idx]
+
+    return [
+        RiskAssessment(
+            risk_category=str(RISK_CATEGORIES[r]) if rk else None,
+            ckd_stage=str(CKD_STAGES[c]) if ek else None,
+            glycaemic_status=str(GLYCAEMIC_STATUS[g]) if hk else None,
+            ldl_target=int(t) if rk else None,
+            # Below a minimum-category goal the patient may still be above a stricter one
+            ldl_at_target=bool(l < t) if rk and lk and not (rm and l < t) else None,
+            risk_is_minimum=bool(rm),
+        )
+        for r, rk, rm, c, ek, g, hk, t, l, lk in zip(
+            risk_idx, risk_known, risk_minimum, ckd_idx, egfr_known, glyc_idx, hba1c_known, targets, ldl, ldl_known
+        )
+    ]
+
+
+def retrieval_terms(profile: PatientProfile, assessment: RiskAssessment) -> list[str]:
+    """Guideline vocabulary derived from the pre-scored categories, used to focus retrieval."""
+    terms = []
+    if assessment.risk_category:
+        terms.append(f"{assessment.risk_category.replace('_', ' ')} cardiovascular risk")
+    if assessment.ldl_at_target is False:
+        terms.append(f"LDL-C goal <{assessment.ldl_target} mg/dL lipid-lowering therapy")
+    if assessment.ckd_stage and assessment.ckd_stage not in ("G1", "G2"):
+        terms.append(f"chronic kidney disease stage {assessment.ckd_stage}")
+    if profile.diabetes or assessment.glycaemic_status == "diabetes_range":
+        terms.append("type 2 diabetes")
+    if profile.hypertension:
+        terms.append("hypertension")
+    if profile.prior_cvd:
+        terms.append("secondary prevention")
+    return terms
+
+
+if __name__ == "__main__":
+    cases_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else None
+    cohort = load_patient_cases(cases_dir)
+    for profile, assessment in zip(cohort, score_cohort(cohort)):
+        logger.info(f"🩺 {profile.age}yo {profile.sex}: {assessment}")
@@ -0,0 +1,109 @@
+import re
+import hashlib
+import numpy as np
+from src.utils.config_loader import CONFIG
+
+NUM_PERM = 128
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Fixed seed: signatures stored at ingestion must stay comparable across processes
+_rng = np.random.default_rng(1337)
+_PERM_A = _rng.integers(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+
+def _shingles(text: str, size: int = 3) -> set[str]:
+    """Word n-grams used as MinHash features (falls back to single tokens for short text)."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < size:
+        return set(tokens)
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def _minhash_shingles(shingles: set[str]) -> np.ndarray:
+    if not shingles:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+
+    base = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    hashed = (np.outer(base, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return hashed.min(axis=0)
+
+
+def minhash(text: str) -> np.ndarray:
+    """
+    MinHash signature of a chunk; the fraction of equal slots estimates the shingle Jaccard similarity.
+    """
+    return _minhash_shingles(_shingles(text))
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+def minhash_metadata(text: str) -> dict:
+    """
+    Signature (hex string, as Chroma metadata only accepts scalars) and shingle count for a text.
+    """
+    shingles = _shingles(text)
+    return {
+        "minhash": _minhash_shingles(shingles).astype(">u4").tobytes().hex(),
+        "minhash_shingles": len(shingles),
+    }
+
+
+def add_minhash_metadata(chunks):
+    """Precomputes the MinHash signature at ingestion time."""
+    for chunk in chunks:
+        chunk.metadata.update(minhash_metadata(chunk.page_content))
+    return chunks
+
+
+def _signature(doc) -> tuple[np.ndarray, int]:
+    stored = doc.metadata.get("minhash")
+    if stored:
+        count = doc.metadata.get("minhash_shingles")
+        if count is None:
+            count = len(_shingles(doc.page_content))
+        return np.frombuffer(bytes.fromhex(stored), dtype=">u4").astype(np.uint64), count
+    shingles = _shingles(doc.page_content)
+    return _minhash_shingles(shingles), len(shingles)
+
+
+def collapse_near_duplicates(docs, min_jaccard: float | None = None, min_shingles: int | None = None):
+    """
+    Keeps the first occurrence of each group of near-duplicate documents.
+    Two documents are duplicates when their estimated shingle Jaccard similarity is at least `min_jaccard`.
+
+    A negation ("is not recommended") changes only a few shingles, so the estimate cannot tell
+    opposite statements apart in short texts: below `min_shingles` only exact matches collapse.
+    Documents with different Class/LOE are never collapsed, and neither are two recommendation
+    rows (the index already drops exact duplicates).
+    """
+    cfg = CONFIG["retrieval"].get("dedup", {})
+    if min_jaccard is None:
+        min_jaccard = cfg.get("min_jaccard", 0.6)
+    if min_shingles is None:
+        min_shingles = cfg.get("min_shingles", 50)
+
+    if not docs:
+        return []
+    signatures, shingle_counts = zip(*(_signature(doc) for doc in docs))
+    signatures, shingle_counts = np.stack(signatures), np.array(shingle_counts)
+    evidence = np.array([f"{doc.metadata.get('class')}/{doc.metadata.get('loe')}" for doc in docs])
+    is_rec = np.array([doc.metadata.get("type") == "recommendation" for doc in docs])
+
+    # Pairwise duplicate matrix in one pass, then a greedy first-occurrence sweep
+    similarity = (signatures[:, None, :] == signatures[None, :, :]).mean(axis=2)
+    threshold = np.where(np.minimum.outer(shingle_counts, shingle_counts) >= min_shingles, min_jaccard, 1.0)
+    duplicate = (similarity >= threshold) & (evidence[:, None] == evidence[None, :]) & ~np.outer(is_rec, is_rec)
+
+    kept = np.zeros(len(docs), dtype=bool)
+    for i in range(len(docs)):
+        kept[i] = not duplicate[i, kept].any()
+    return [doc for doc, keep in zip(docs, kept) if keep]
@@ -0,0 +1,173 @@
+import re
+import json
+from threading import Lock
+import numpy as np
+from rank_bm25 import BM25Okapi
+from langchain_core.documents import Document
+from src.retrieval.dedup import minhash_metadata
+from src.utils.config_loader import CONFIG, PROJECT_ROOT
+from src.utils.logger import logger
+
+# ESC tables end each row with "<Class> <Level>", e.g. "... are recommended.   I   A"
+_ROW_END_RE = re.compile(r"^(?P<text>.*?)\s*\b(?P<cls>III|IIb|IIa|I)\s+(?P<loe>[ABC])\s*$")
+_HEADER_RE = re.compile(r"^\s*Recommendations?\b.*\bClass\w*\s+Level\w*\s*$", re.IGNORECASE)
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_MAX_ROW_LINES = 6
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or should that the this "
+    "to was what when where which who why with".split()
+)
+
+CLASS_RANK = {"I": 0, "IIa": 1, "IIb": 2, "III": 3}
+
+
+def _tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _page_content(record: dict) -> str:
+    return f"[Class {record['class']}, LOE {record['loe']}] {record['statement']}"
+
+
+def extract_recommendations(chunk) -> list[dict]:
+    """
+    Pulls recommendation-table rows (statement, class, level of evidence) out of a page chunk.
+    Multi-line statements are stitched back together; prose lines are dropped at blank lines and headers.
+    The rolling-overlap prefix (previous page's last sentence) is skipped so rows are attributed to their own page.
+    """
+    records, buffer = [], []
+    own_text = chunk.page_content[chunk.metadata.get("overlap_chars", 0):]
+    for line in own_text.splitlines():
+        line = line.strip()
+        if not line or _HEADER_RE.match(line):
+            buffer = []
+            continue
+
+        match = _ROW_END_RE.match(line)
+        if not match:
+            buffer = (buffer + [line])[-_MAX_ROW_LINES:]
+            continue
+
+        statement = " ".join(buffer + [match.group("text")]).strip(" .…")
+        buffer = []
+        if len(statement.split()) < 4:
+            continue
+        records.append({
+            "statement": statement,
+            "class": match.group("cls"),
+            "loe": match.group("loe"),
+            "source": chunk.metadata.get("source", "Unknown"),
+            "page": chunk.metadata.get("page"),
+        })
+    return records
+
+
+class RecommendationIndex:
+    """
+    Compact keyword index over Class/LOE statements, persisted as JSONL next to the processed data.
+    Queried before the vector store so targeted evidence reaches the prompt first.
+    """
+    _instance = None
+    _lock = Lock()
+
+    def __init__(self):
+        cfg = CONFIG.get("recommendations", {})
+        self.path = PROJECT_ROOT / cfg.get("index_path", "data/processed/recommendations.jsonl")
+        self._snapshot: tuple[list[dict], BM25Okapi | None] = ([], None)
+        self._build()
+
+    @property
+    def records(self) -> list[dict]:
+        return self._snapshot[0]
+
+    def _build(self):
+        """
+        Loads the JSONL index (deduplicated by source + statement) and builds BM25.
+        Records and BM25 are swapped in as one snapshot, so a search running during a refresh
+        never pairs the old BM25 with the new record list.
+        """
+        records, seen = [], set()
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                for line in f:
+                    record = json.loads(line)
+                    key = (record["source"], record["statement"])
+                    if key not in seen:
+                        seen.add(key)
+                        records.append(record)
+
+        bm25 = BM25Okapi([_tokenize(r["statement"]) for r in records]) if records else None
+        self._snapshot = (records, bm25)
+        logger.info(f"📌 Recommendations: Indexed {len(records)} Class/LOE statements.")
+
+    def add(self, records: list[dict]):
+        """
+        Appends extracted rows to the on-disk index (call `refresh` once ingestion finishes).
+        The MinHash signature is stored with each row so query-time dedup does not recompute it.
+        """
+        if not records:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            for record in records:
+                f.write(json.dumps({**record, **minhash_metadata(_page_content(record))}) + "\n")
+
+    def refresh(self):
+        self._build()
+
+    def search(self, queries: str | list[str], k: int | None = None, min_score: float | None = None) -> list[Document]:
+        """
+        Top statements for a query (or its variants): strongest class first, most relevant first within a class.
+
+        Relevance is BM25 divided by the score a statement matching every informative query term once
+        would get, so `min_score` is a 0-1 coverage threshold that does not grow with query length.
+        Each variant is scored on its own and the best variant counts.
+        """
+        cfg = CONFIG.get("recommendations", {})
+        k = k if k is not None else cfg.get("k", 4)
+        min_score = min_score if min_score is not None else cfg.get("min_score", 0.3)
+        records, bm25 = self._snapshot
+        if bm25 is None or k <= 0:
+            return []
+
+        if isinstance(queries, str):
+            queries = [queries]
+        # Terms absent from the index count as rare, so unmatched query concepts lower relevance
+        max_idf = max(bm25.idf.values())
+        relevance = np.zeros(len(records))
+        for query in queries:
+            tokens = list(dict.fromkeys(t for t in _tokenize(query) if t not in _STOPWORDS))
+            if not tokens:
+                continue
+            attainable = sum(bm25.idf.get(t, max_idf) for t in tokens)
+            # BM25Okapi idf is <= 0 in tiny indexes (two records or fewer): no meaningful relevance
+            if attainable <= 0:
+                continue
+            relevance = np.maximum(relevance, np.clip(bm25.get_scores(tokens) / attainable, 0.0, 1.0))
+
+        ranked = np.argsort(-relevance, kind="stable")[:k]
+        hits = [(records[i], float(relevance[i])) for i in ranked if relevance[i] >= min_score]
+        hits.sort(key=lambda hit: (CLASS_RANK[hit[0]["class"]], -hit[1]))
+
+        return [
+            Document(
+                page_content=_page_content(r),
+                metadata={
+                    "source": r["source"] if r.get("page") is None else f"{r['source']} (p. {r['page'] + 1})",
+                    "type": "recommendation",
+                    "class": r["class"],
+                    "loe": r["loe"],
+                    "relevance": round(score, 3),
+                    # Rows indexed before signatures were stored fall back to on-the-fly MinHash
+                    **{key: r[key] for key in ("minhash", "minhash_shingles") if key in r},
+                },
+            )
+            for r, score in hits
+        ]
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
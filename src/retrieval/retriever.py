@@ -63,12 +63,15 @@ class RetrieverManager:
         return cls._instance
 
 
-def get_retriever(metadata_filter: dict | None = None):
+def get_retriever(metadata_filter: dict | None = None, k: int | None = None):
     
     manager = RetrieverManager.get_instance()
     
+    # `k` overrides the configured depth of both retrievers for this call only
+    k = k if k is not None else CONFIG["retrieval"]["k"]
+
     # 1. Dense Retriever
-    search_kwargs = {"k": CONFIG["retrieval"]["k"]}
+    search_kwargs = {"k": k}
     if metadata_filter:
         search_kwargs["filter"] = metadata_filter
     
@@ -76,8 +79,10 @@ def get_retriever(metadata_filter: dict | None = None):
     
     # 2. Hybrid Ensemble Retriever
     if manager.bm25_retriever:
+        # Shallow copy: shares the fitted index, so the singleton's depth is left untouched
+        keyword_retriever = manager.bm25_retriever.model_copy(update={"k": k})
         base_retriever = EnsembleRetriever(
-            retrievers=[manager.bm25_retriever, dense_retriever],
+            retrievers=[keyword_retriever, dense_retriever],
             weights=[1 - CONFIG["retrieval"]["hybrid_alpha"], CONFIG["retrieval"]["hybrid_alpha"]]
         )
     else:
@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import importlib
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed
+from functools import lru_cache
+from threading import BoundedSemaphore, Lock
+from typing import Any
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from src.utils.config_loader import CONFIG
+from src.utils.logger import logger
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+_async_lock = Lock()
+
+
+class LocalStubChatModel(BaseChatModel):
+    """
+    Deterministic offline provider (llm.provider: local).
+    Same prompt -> same answer, so the whole pipeline can be load-tested without API keys.
+    """
+    model: str = "local-stub"
+    latency_s: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-stub"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = "\n".join(str(m.content) for m in messages)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        last_line = next((line.strip() for line in reversed(prompt.splitlines()) if line.strip()), "")
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        text = f"[local-stub {digest}] {last_line}"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+# --- 1. SHARED POOLS ---
+def _pool_limits() -> httpx.Limits:
+    pool = CONFIG["llm"].get("pool", {})
+    return httpx.Limits(
+        max_connections=pool.get("max_connections", 20),
+        max_keepalive_connections=pool.get("max_keepalive_connections", 10),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """Process-wide keep-alive pool shared by every sync LLM call."""
+    return httpx.Client(limits=_pool_limits(), timeout=CONFIG["llm"].get("timeout_s", 60))
+
+
+def get_async_openai_client(base_url: str, api_key: str):
+    """
+    Shared AsyncOpenAI client for OpenAI-compatible endpoints (Graphiti LLM and embedder).
+    Async connections are bound to an event loop, so one pool is kept per running loop.
+    """
+    from openai import AsyncOpenAI
+
+    loop = asyncio.get_running_loop()
+    with _async_lock:
+        clients = _async_clients.setdefault(loop, {})
+        key = (base_url, api_key)
+        if key not in clients:
+            http_client = httpx.AsyncClient(limits=_pool_limits(), timeout=CONFIG["llm"].get("timeout_s", 60))
+            clients[key] = AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=http_client)
+        return clients[key]
+
+
+@lru_cache(maxsize=1)
+def _concurrency_gate() -> BoundedSemaphore:
+    return BoundedSemaphore(CONFIG["llm"].get("max_concurrency", 8))
+
+
+@lru_cache(maxsize=1)
+def _hedge_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=CONFIG["llm"].get("max_concurrency", 8) * 2, thread_name_prefix="llm-hedge")
+
+
+def _retryable_errors() -> tuple:
+    """Rate-limit / transient error types of whichever provider SDKs are installed."""
+    errors = [httpx.TimeoutException, httpx.ConnectError]
+    for module_name in ("openai", "groq", "anthropic"):
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        for name in ("RateLimitError", "APITimeoutError", "APIConnectionError"):
+            if hasattr(module, name):
+                errors.append(getattr(module, name))
+    return tuple(errors)
+
+
+# --- 2. PROVIDERS ---
+def _build_provider_model(temperature: float, max_tokens: int | None) -> BaseChatModel:
+    llm_cfg = CONFIG["llm"]
+    provider = llm_cfg.get("provider", "groq")
+    model = llm_cfg["model"]
+    # Retries are handled by the wrapper below, not by each SDK
+    common: dict[str, Any] = {"model": model, "temperature": temperature, "max_retries": 0}
+    if max_tokens is not None:
+        common["max_tokens"] = max_tokens
+
+    if provider == "groq":
+        from langchain_groq import ChatGroq
+        return ChatGroq(http_client=get_http_client(), **common)
+    if provider in ("openai", "ollama"):
+        from langchain_openai import ChatOpenAI
+        if provider == "ollama":
+            common["base_url"] = llm_cfg.get("base_url") or "http://localhost:11434/v1"
+            common["api_key"] = "ollama"
+        elif llm_cfg.get("base_url"):
+            common["base_url"] = llm_cfg["base_url"]
+        return ChatOpenAI(http_client=get_http_client(), **common)
+    if provider == "anthropic":
+        # Optional dependency: pip install langchain-anthropic
+        from langchain_anthropic import ChatAnthropic
+        return ChatAnthropic(**common)
+    if provider == "local":
+        return LocalStubChatModel(model=model, latency_s=llm_cfg.get("stub_latency_s", 0.0))
+
+    raise ValueError(f"Unsupported llm.provider '{provider}'. Options: openai, ollama, anthropic, groq, local")
+
+
+def _bounded(model: BaseChatModel, hedge_after_s: float, gate: BoundedSemaphore):
+    """Caps in-flight calls and, if configured, fires a hedged duplicate for slow requests."""
+
+    def _call(prompt_value):
+        with gate:
+            return model.invoke(prompt_value)
+
+    def _invoke(prompt_value):
+        if not hedge_after_s:
+            return _call(prompt_value)
+
+        executor = _hedge_executor()
+        primary = executor.submit(_call, prompt_value)
+        done, _ = wait([primary], timeout=hedge_after_s)
+        if done:
+            return primary.result()
+
+        logger.info(f"⏱️ LLM call exceeded {hedge_after_s}s, sending hedged request.")
+        attempts = [primary, executor.submit(_call, prompt_value)]
+        errors = []
+        # First successful reply wins; a fast failure (e.g. a 429 on the duplicate) must not mask the other call
+        for future in as_completed(attempts):
+            try:
+                result = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            for other in attempts:
+                other.cancel()
+            return result
+        raise errors[0]
+
+    async def _ainvoke(prompt_value):
+        return await asyncio.to_thread(_invoke, prompt_value)
+
+    return RunnableLambda(_invoke, afunc=_ainvoke, name=f"bounded_{model._llm_type}")
+
+
+def wrap_chat_model(model: BaseChatModel, gate: BoundedSemaphore | None = None):
+    """
+    Adds the shared concurrency cap, optional request hedging and jittered exponential
+    backoff on rate limits to any chat model.
+    """
+    llm_cfg = CONFIG["llm"]
+    return _bounded(model, llm_cfg.get("hedge_after_s", 0), gate or _concurrency_gate()).with_retry(
+        retry_if_exception_type=_retryable_errors(),
+        wait_exponential_jitter=True,
+        exponential_jitter_params={
+            "initial": llm_cfg.get("retry_initial_wait_s", 1.0),
+            "max": llm_cfg.get("retry_max_wait_s", 30.0),
+        },
+        stop_after_attempt=llm_cfg.get("max_retries", 3) + 1,
+    )
+
+
+def get_chat_model(temperature: float | None = None, max_tokens: int | None = None):
+    """
+    Single entry point for chat LLMs used by the rewriter and generator.
+    Reads `llm` settings from config; every provider, including the local stub, goes through `wrap_chat_model`.
+    """
+    if temperature is None:
+        temperature = CONFIG["llm"].get("temperature", 0.1)
+    return wrap_chat_model(_build_provider_model(temperature, max_tokens))
+
+
+def is_offline() -> bool:
+    """
+    `llm.provider: local` runs the pipeline without network services:
+    stub LLM, no Graphiti/Ollama graph stage and no Cohere rerank.
+    """
+    return CONFIG["llm"].get("provider") == "local"
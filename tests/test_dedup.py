@@ -0,0 +1,57 @@
+from langchain_core.documents import Document
+from src.retrieval.dedup import minhash, jaccard, add_minhash_metadata, collapse_near_duplicates
+
+GUIDELINE_TEXT = (
+    "In patients with established ASCVD, an LDL-C reduction of at least 50 percent from baseline "
+    "and an LDL-C goal of less than 1.4 mmol/L are recommended. High-intensity statin therapy is "
+    "recommended up to the highest tolerated dose to reach the goals set for the specific level of risk. "
+    "If the goals are not achieved with the maximum tolerated dose of a statin, combination with "
+    "ezetimibe is recommended. For secondary prevention patients at very-high risk not achieving "
+    "their goal on a maximum tolerated dose of a statin and ezetimibe, a combination including a "
+    "PCSK9 inhibitor is recommended."
+)
+PREVIOUS_PAGE_LAST_SENTENCE = "Lipid-lowering therapy should be reassessed 4-6 weeks after any change in treatment."
+
+
+def test_minhash_estimates_similarity():
+    near_copy = GUIDELINE_TEXT.replace("recommended.", "recommended (Class I, LOE A).")
+
+    assert jaccard(minhash(GUIDELINE_TEXT), minhash(GUIDELINE_TEXT)) == 1.0
+    assert jaccard(minhash(GUIDELINE_TEXT), minhash(near_copy)) > 0.7
+    assert jaccard(minhash(GUIDELINE_TEXT), minhash("Anticoagulation is recommended in atrial fibrillation.")) < 0.1
+
+
+def test_collapse_near_duplicates_at_default_threshold():
+    """A rolling-overlap copy and a graph restatement collapse onto the original chunk."""
+    docs = add_minhash_metadata([
+        Document(page_content=GUIDELINE_TEXT, metadata={"source": "ESC_2019.pdf"}),
+        Document(page_content=f"...{PREVIOUS_PAGE_LAST_SENTENCE}\n\n{GUIDELINE_TEXT}", metadata={"source": "ESC_2019.pdf"}),
+        Document(page_content=GUIDELINE_TEXT.replace("recommended.", "recommended (Class I, LOE A)."), metadata={"source": "Knowledge Graph"}),
+        Document(page_content="Beta-blockers are recommended after myocardial infarction with reduced LVEF.", metadata={"source": "ESC_2023.pdf"}),
+    ])
+
+    kept = collapse_near_duplicates(docs)
+
+    assert [d.page_content for d in kept] == [GUIDELINE_TEXT, docs[3].page_content]
+    assert all("minhash" in d.metadata for d in docs)
+
+
+def test_negated_statements_are_not_collapsed():
+    """Opposite statements differ in only a few shingles; neither may silently drop the other."""
+    statement = (
+        "In patients at very-high cardiovascular risk with established ASCVD, a combination of a "
+        "statin with ezetimibe is recommended to reach the LDL-C goal"
+    )
+    negated = statement.replace("is recommended", "is not recommended")
+    assert jaccard(minhash(statement), minhash(negated)) >= 0.6
+
+    recs = [
+        Document(page_content=f"[Class I, LOE B] {statement}", metadata={"type": "recommendation", "class": "I", "loe": "B"}),
+        Document(page_content=f"[Class III, LOE B] {negated}", metadata={"type": "recommendation", "class": "III", "loe": "B"}),
+    ]
+    graph_facts = [Document(page_content=text, metadata={"source": "Knowledge Graph"}) for text in (statement, negated)]
+
+    assert collapse_near_duplicates(recs) == recs
+    assert collapse_near_duplicates(graph_facts) == graph_facts
+    # Below the shingle floor only exact copies collapse
+    assert collapse_near_duplicates(graph_facts + graph_facts[:1]) == graph_facts
@@ -0,0 +1,104 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+import httpx
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.output_parsers import StrOutputParser
+from src.utils.config_loader import CONFIG
+from src.utils.llm_factory import get_chat_model, wrap_chat_model
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Fake provider: each call pops the next (delay, outcome) step; outcomes are text or exceptions."""
+    steps: list = []
+    calls: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        with _state_lock:
+            step = self.steps[min(self.calls, len(self.steps) - 1)]
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay, outcome = step
+            time.sleep(delay)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=outcome))])
+        finally:
+            with _state_lock:
+                self.in_flight -= 1
+
+
+_state_lock = threading.Lock()
+
+
+@pytest.fixture
+def fast_llm_config(monkeypatch):
+    for key, value in {"max_retries": 3, "retry_initial_wait_s": 0.01, "retry_max_wait_s": 0.02, "hedge_after_s": 0}.items():
+        monkeypatch.setitem(CONFIG["llm"], key, value)
+
+
+def test_local_stub_provider_is_deterministic(monkeypatch, fast_llm_config):
+    """The offline stub must answer identically for identical prompts (load-testing baseline)."""
+    monkeypatch.setitem(CONFIG["llm"], "provider", "local")
+    chain = get_chat_model() | StrOutputParser()
+
+    first = chain.invoke("Optimal LDL-C target for a diabetic patient?")
+
+    assert first == chain.invoke("Optimal LDL-C target for a diabetic patient?")
+    assert first.startswith("[local-stub ")
+    assert first != chain.invoke("Anticoagulation in atrial fibrillation?")
+
+
+def test_retries_rate_limit_errors(fast_llm_config):
+    openai = pytest.importorskip("openai")
+    rate_limited = openai.RateLimitError(
+        "rate limited",
+        response=httpx.Response(429, request=httpx.Request("POST", "https://api.example/v1/chat")),
+        body=None,
+    )
+    model = ScriptedChatModel(steps=[(0, rate_limited), (0, rate_limited), (0, "ok")])
+
+    assert (wrap_chat_model(model) | StrOutputParser()).invoke("q") == "ok"
+    assert model.calls == 3
+
+
+def test_concurrency_cap(fast_llm_config):
+    model = ScriptedChatModel(steps=[(0.05, "ok")])
+    llm = wrap_chat_model(model, gate=BoundedSemaphore(2))
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(llm.invoke, ["q"] * 6))
+
+    assert model.calls == 6
+    assert model.max_in_flight == 2
+
+
+def test_hedge_returns_first_success_when_duplicate_fails_fast(monkeypatch, fast_llm_config):
+    monkeypatch.setitem(CONFIG["llm"], "hedge_after_s", 0.05)
+    monkeypatch.setitem(CONFIG["llm"], "max_retries", 0)
+    # Primary is slow but succeeds; the hedged duplicate fails immediately
+    model = ScriptedChatModel(steps=[(0.2, "primary"), (0, RuntimeError("duplicate failed"))])
+
+    assert (wrap_chat_model(model, gate=BoundedSemaphore(4)) | StrOutputParser()).invoke("q") == "primary"
+    assert model.calls == 2
+
+
+def test_hedge_raises_when_both_attempts_fail(monkeypatch, fast_llm_config):
+    monkeypatch.setitem(CONFIG["llm"], "hedge_after_s", 0.02)
+    monkeypatch.setitem(CONFIG["llm"], "max_retries", 0)
+    model = ScriptedChatModel(steps=[(0.1, RuntimeError("primary failed")), (0, RuntimeError("duplicate failed"))])
+
+    with pytest.raises(RuntimeError):
+        wrap_chat_model(model, gate=BoundedSemaphore(4)).invoke("q")
@@ -1,6 +1,7 @@
 import pytest
 from pathlib import Path
-from src.ingestion.loader import load_and_chunk_pdf
+from langchain_core.documents import Document
+from src.ingestion.loader import load_and_chunk_pdf, stream_rolling_overlap
 
 def test_load_and_chunk_pdf(tmp_path):
     """Verify that a PDF is correctly split into chunks with metadata."""
@@ -19,4 +20,15 @@ def test_load_and_chunk_pdf(tmp_path):
     assert len(chunks) > 0
     assert "source" in chunks[0].metadata
     assert "chunk_id" in chunks[0].metadata
-    assert chunks[0].metadata["source"] == "sample.pdf"
\ No newline at end of file
+    assert chunks[0].metadata["source"] == "sample.pdf"
+
+def test_stream_rolling_overlap_is_lazy():
+    """Each page is prefixed with the previous page's last sentence without materializing the document."""
+    pages = (Document(page_content=t) for t in ["Statins lower LDL. Start early.", "Monitor liver enzymes."])
+    stream = stream_rolling_overlap(pages)
+
+    assert next(stream).page_content == "Statins lower LDL. Start early."
+    second = next(stream)
+    assert second.page_content == "...Start early.\n\nMonitor liver enzymes."
+    assert second.page_content[second.metadata["overlap_chars"]:] == "Monitor liver enzymes."
+
@@ -0,0 +1,85 @@
+import pytest
+from pathlib import Path
+from src.patient.profile import PatientProfile, load_patient, load_patient_cases, score_cohort, retrieval_terms
+
+CASES_DIR = Path(__file__).resolve().parent.parent / "data" / "patient_cases"
+
+
+def test_load_patient_parses_case_file():
+    profile = load_patient(CASES_DIR / "sample_patient_1.json")
+
+    assert profile.age == 68
+    assert profile.hba1c == 7.2
+    assert profile.diabetes and profile.hypertension
+    assert "68yo Male" in profile.to_summary()
+
+
+def test_score_cohort_assigns_guideline_categories():
+    base = load_patient(CASES_DIR / "sample_patient_2.json")
+    post_mi = PatientProfile.from_dict({**_as_dict(base), "prior_cvd": True, "ldl": 85})
+    ckd = PatientProfile.from_dict({**_as_dict(base), "egfr": 40})
+
+    base_a, post_mi_a, ckd_a = score_cohort([base, post_mi, ckd])
+
+    assert post_mi_a.risk_category == "very_high"
+    assert post_mi_a.ldl_target == 55 and not post_mi_a.ldl_at_target
+    assert ckd_a.ckd_stage == "G3b" and ckd_a.risk_category == "high"
+    assert base_a.ckd_stage == "G1"
+    assert "secondary prevention" in retrieval_terms(post_mi, post_mi_a)
+
+
+def test_score_whole_cohort():
+    cohort = load_patient_cases(CASES_DIR)
+    assessments = score_cohort(cohort)
+
+    assert len(assessments) == len(cohort) == 10
+    assert score_cohort([]) == []
+
+
+def _as_dict(profile: PatientProfile) -> dict:
+    return {
+        "age": profile.age, "sex": profile.sex, "height": profile.height, "weight": profile.weight,
+        "hypertension": profile.hypertension, "diabetes": profile.diabetes, "dyslipidemia": profile.dyslipidemia,
+        "smoking": profile.smoking, "family_history_cvd": profile.family_history_cvd, "prior_cvd": profile.prior_cvd,
+        "total_cholesterol": profile.total_cholesterol, "ldl": profile.ldl, "hdl": profile.hdl,
+        "triglycerides": profile.triglycerides, "hbA1c": profile.hba1c, "egfr": profile.egfr,
+    }
+
+
+def test_missing_measurements_are_not_scored():
+    profile = PatientProfile.from_dict({"age": 58, "sex": "Female", "ldl": 160, "hypertension": True})
+    assessment = score_cohort([profile])[0]
+
+    assert profile.hba1c is None and profile.bmi is None
+    assert assessment.glycaemic_status is None
+    assert assessment.ckd_stage is None
+    assert assessment.risk_category is None and assessment.ldl_at_target is None
+    assert "HbA1c" not in profile.to_summary()
+    assert "normoglycaemia" not in assessment.describe()
+
+
+def test_very_high_risk_is_scored_without_full_labs():
+    assessment = score_cohort([PatientProfile.from_dict({"age": 60, "prior_cvd": True, "ldl": 80})])[0]
+
+    assert assessment.risk_category == "very_high"
+    assert assessment.ldl_target == 55 and assessment.ldl_at_target is False
+
+
+def test_invalid_case_raises_value_error():
+    with pytest.raises(ValueError):
+        PatientProfile.from_dict({"sex": "Male", "ldl": 120})
+    with pytest.raises(ValueError):
+        PatientProfile.from_dict({"age": 50, "ldl": "high"})
+
+
+def test_high_risk_criterion_with_unknown_egfr_reports_minimum_category():
+    """LDL-C >= 190 mg/dL is at least high risk; unknown eGFR could still make it very high."""
+    profile = PatientProfile.from_dict({"age": 65, "ldl": 190, "hypertension": True})
+    assessment = score_cohort([profile])[0]
+
+    assert assessment.risk_category == "high" and assessment.risk_is_minimum
+    assert assessment.ldl_target == 70 and assessment.ldl_at_target is False
+    assert assessment.describe().startswith("≥ high CV risk")
+
+    exact = score_cohort([PatientProfile.from_dict({"age": 65, "ldl": 190, "hypertension": True, "egfr": 75})])[0]
+    assert exact.risk_category == "high" and not exact.risk_is_minimum
@@ -0,0 +1,41 @@
+import pytest
+from src.ingestion.pdf_pages import iter_pdf_pages, page_ranges, create_page_pool
+
+
+@pytest.fixture
+def guideline_pdf(tmp_path):
+    """A 7-page PDF whose page i contains the text 'Guideline page i'."""
+    canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+    path = tmp_path / "guideline.pdf"
+    pdf = canvas.Canvas(str(path))
+    for i in range(7):
+        pdf.drawString(72, 720, f"Guideline page {i}")
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+def test_page_ranges_cover_document():
+    assert page_ranges(60, 25) == [(0, 25), (25, 50), (50, 60)]
+
+
+def test_iter_pdf_pages_in_process(guideline_pdf):
+    pages = list(iter_pdf_pages(guideline_pdf))
+
+    assert [i for i, _ in pages] == list(range(7))
+    assert "Guideline page 3" in pages[3][1]
+
+
+def test_iter_pdf_pages_process_pool_keeps_page_order(guideline_pdf):
+    pool = create_page_pool(2)
+    try:
+        pages = list(iter_pdf_pages(guideline_pdf, executor=pool, pages_per_worker=2, max_in_flight=2))
+    finally:
+        pool.shutdown()
+
+    assert [i for i, _ in pages] == list(range(7))
+    assert all(f"Guideline page {i}" in text for i, text in pages)
+
+
+def test_single_worker_has_no_pool():
+    assert create_page_pool(1) is None
@@ -0,0 +1,91 @@
+import math
+import warnings
+from langchain_core.documents import Document
+from src.utils.config_loader import CONFIG
+from src.retrieval.dedup import minhash_metadata
+from src.retrieval.recommendations import RecommendationIndex, extract_recommendations
+
+ESC_TABLE_PAGE = """Recommendations for drug treatments of patients with dyslipidaemia Classa Levelb
+It is recommended that a high-intensity statin is prescribed up to the
+highest tolerated dose to reach the goals set for the specific level of risk. I A
+If the goals are not achieved, combination with ezetimibe is recommended. I B
+In primary prevention patients at very-high risk, but without FH, if the LDL-C goal
+is not achieved, a combination with a PCSK9 inhibitor may be considered. IIb C
+
+Statin therapy is not recommended in premenopausal patients considering pregnancy. III C"""
+
+
+def test_extract_recommendations_from_table_rows():
+    chunk = Document(page_content=ESC_TABLE_PAGE, metadata={"source": "ESC_2019_Dyslipidaemia.pdf", "page": 26})
+    records = extract_recommendations(chunk)
+
+    assert [(r["class"], r["loe"]) for r in records] == [("I", "A"), ("I", "B"), ("IIb", "C"), ("III", "C")]
+    assert records[0]["statement"].startswith("It is recommended that a high-intensity statin")
+    assert records[0]["page"] == 26
+
+
+def test_recommendation_index_search(tmp_path, monkeypatch):
+    monkeypatch.setitem(CONFIG, "recommendations", {"index_path": str(tmp_path / "recs.jsonl")})
+    chunk = Document(page_content=ESC_TABLE_PAGE, metadata={"source": "ESC_2019_Dyslipidaemia.pdf", "page": 26})
+
+    index = RecommendationIndex()
+    index.add(extract_recommendations(chunk))
+    index.add(extract_recommendations(chunk))  # re-ingestion must not duplicate rows
+    index.refresh()
+
+    assert len(index.records) == 4
+    hits = index.search(["What is the add-on after statin?", "ezetimibe combination when LDL-C goals not achieved"], k=3)
+    assert hits[0].metadata["class"] == "I" and "ezetimibe" in hits[0].page_content
+    assert hits[0].metadata["source"] == "ESC_2019_Dyslipidaemia.pdf (p. 27)"
+    assert 0.0 < hits[0].metadata["relevance"] <= 1.0
+    # Signatures are stored at ingestion and passed through for query-time dedup
+    assert hits[0].metadata["minhash"] == minhash_metadata(hits[0].page_content)["minhash"]
+
+    # Unrelated queries fall below the default threshold instead of filling prompt slots
+    assert index.search("anticoagulation in atrial fibrillation") == []
+
+
+def test_recommendation_hits_ranked_by_relevance_within_class(tmp_path, monkeypatch):
+    monkeypatch.setitem(CONFIG, "recommendations", {"index_path": str(tmp_path / "recs.jsonl")})
+    index = RecommendationIndex()
+    index.add([
+        {"statement": "Statins are recommended in patients older than 70 at high risk", "class": "I", "loe": "A", "source": "a.pdf", "page": 1},
+        {"statement": "PCSK9 inhibitors are recommended after ezetimibe and statin fail to reach goal", "class": "I", "loe": "B", "source": "a.pdf", "page": 2},
+        {"statement": "Bempedoic acid may be considered with ezetimibe when statins are not tolerated", "class": "IIb", "loe": "B", "source": "a.pdf", "page": 3},
+    ])
+    index.refresh()
+
+    hits = index.search("PCSK9 inhibitor after ezetimibe", k=3, min_score=0.0)
+
+    assert [h.metadata["class"] for h in hits] == ["I", "I", "IIb"]
+    assert "PCSK9" in hits[0].page_content
+
+
+def test_overlap_prefix_is_not_extracted_again():
+    """The previous page's last row, carried over by the rolling overlap, belongs to the previous page."""
+    prefix = "...In primary prevention patients at very-high risk, but without FH, if the LDL-C goal\nis not achieved, a combination with a PCSK9 inhibitor may be considered. IIb C\n\n"
+    chunk = Document(
+        page_content=prefix + "Statin therapy is not recommended in premenopausal patients considering pregnancy. III C",
+        metadata={"source": "ESC_2019_Dyslipidaemia.pdf", "page": 27, "overlap_chars": len(prefix)},
+    )
+
+    records = extract_recommendations(chunk)
+
+    assert [(r["class"], r["page"]) for r in records] == [("III", 27)]
+
+
+def test_tiny_index_search_has_no_nan_relevance(tmp_path, monkeypatch):
+    """With two records BM25Okapi idf is <= 0; search must not divide by it."""
+    monkeypatch.setitem(CONFIG, "recommendations", {"index_path": str(tmp_path / "recs.jsonl")})
+    index = RecommendationIndex()
+    index.add([
+        {"statement": "Statins are recommended in patients older than 70 at high risk", "class": "I", "loe": "A", "source": "a.pdf", "page": 1},
+        {"statement": "Bempedoic acid may be considered when statins are not tolerated", "class": "IIb", "loe": "B", "source": "a.pdf", "page": 2},
+    ])
+    index.refresh()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        hits = index.search("bempedoic acid", min_score=0.0)
+
+    assert all(not math.isnan(h.metadata["relevance"]) for h in hits)